@@ -0,0 +1,32 @@
+import boa
+import pytest
+
+from script.deploy_ec_matmul import deploy_ec_matmul
+from script.deploy_rational_adder import deploy_rational_adder
+
+
+# ---------------------------------------------------------------------------
+# Contract fixtures (compiled + deployed once per test session)
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="session")
+def ec_matmul():
+    """Deploy the Vyper matrix-verifier contract once for the entire session."""
+    return deploy_ec_matmul()
+
+
+@pytest.fixture(scope="session")
+def rational_adder():
+    """Deploy the Vyper rational-adder contract once for the entire session."""
+    return deploy_rational_adder()
+
+
+# ---------------------------------------------------------------------------
+# EVM state isolation
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(autouse=True)
+def _evm_snapshot():
+    """Snapshot EVM state before each test and revert to it afterwards."""
+    with boa.env.anchor():
+        yield
@@ -1,9 +1,9 @@
-from script.deploy_ec_matmul import deploy_ec_matmul
+from functools import lru_cache
+from operator import mul
 import pytest
-from hypothesis import given, strategies as st, settings
+from hypothesis import example, given, strategies as st, settings
 
-# ---- py_ecc gives us BN-254 arithmetic off-chain ---------------------------
-from py_ecc.bn128.bn128_curve import multiply
+# ---- py_ecc gives us the BN-254 constants; kG itself runs on raw ints -----
 from py_ecc.bn128.bn128_curve import G1, curve_order as R
 from py_ecc.bn128.bn128_curve import field_modulus as P
 
@@ -11,68 +11,159 @@ from py_ecc.bn128.bn128_curve import field_modulus as P
 MAX_DIM = 6
 
 # ----------------------------------------------------------------------------
-# Contract fixture
+# Raw-int curve arithmetic (y^2 = x^3 + 3 over F_p, None = point at infinity)
 # ----------------------------------------------------------------------------
-@pytest.fixture(scope="module")
-def ec_matmul():
-    """Deploy the Vyper matrix-verifier contract once for the entire module."""
-    return deploy_ec_matmul()
+def _affine_add(p1, p2):
+    """Affine p1 + p2 over plain ints; only used to build the comb table."""
+    if p1 is None or p2 is None:
+        return p1 if p2 is None else p2
+    (x1, y1), (x2, y2) = p1, p2
+    if x1 == x2:
+        if (y1 + y2) % P == 0:
+            return None
+        m = 3 * x1 * x1 * pow(2 * y1, -1, P) % P
+    else:
+        m = (y2 - y1) * pow(x2 - x1, -1, P) % P
+    x3 = (m * m - x1 - x2) % P
+    return (x3, (m * (x1 - x3) - y1) % P)
+
+def _mixed_add(q, pt):
+    """Jacobian q + affine pt (x = X/Z^2, y = Y/Z^3); no field inverse needed."""
+    if q is None:
+        return (pt[0], pt[1], 1)
+    X1, Y1, Z1 = q
+    x2, y2     = pt
+    ZZ = Z1 * Z1 % P
+    H  = (x2 * ZZ - X1) % P
+    r  = (y2 * ZZ * Z1 - Y1) % P
+    # g_mul only adds b*2^(W*i)*G to k_low*G with 0 < k_low + b*2^(W*i) < R,
+    # so q can never be +-pt and the doubling / infinity cases cannot occur
+    assert H != 0, "comb accumulator collided with a table entry"
+    HH  = H * H % P
+    HHH = H * HH % P
+    V   = X1 * HH % P
+    X3  = (r * r - HHH - 2 * V) % P
+    Y3  = (r * (V - X3) - Y1 * HHH) % P
+    return (X3, Y3, Z1 * H % P)
+
+# ----------------------------------------------------------------------------
+# Fixed-base comb table for G1
+# ----------------------------------------------------------------------------
+# COMB[i][b] = b * 2^(COMB_W*i) * G, so kG is one table lookup + add per limb
+COMB_W     = 8
+COMB_LIMBS = (R.bit_length() + COMB_W - 1) // COMB_W
+COMB_MASK  = (1 << COMB_W) - 1
+
+def _build_comb():
+    """Precompute the COMB_LIMBS x 2^COMB_W affine multiples of G as int pairs."""
+    table = []
+    base  = (G1[0].n, G1[1].n)
+    for _ in range(COMB_LIMBS):
+        row, acc = [None], None
+        for _ in range(COMB_MASK):
+            acc = _affine_add(acc, base)
+            row.append(acc)
+        table.append(row)
+        for _ in range(COMB_W):
+            base = _affine_add(base, base)
+    return table
+
+COMB = _build_comb()
 
 # ----------------------------------------------------------------------------
 # Helper functions
 # ----------------------------------------------------------------------------
 def to_affine(pt):
-    """Convert a py_ecc (FQ,FQ) point to integer tuple modulo the base field."""
-    # py_ecc uses None for the point at infinity
-    if pt is None:                
+    """Convert a raw-int Jacobian (X,Y,Z) point to an affine integer tuple."""
+    # None is the point at infinity
+    if pt is None:
         return (0, 0)
-    x, y = pt
-    return (int(x.n) % P, int(y.n) % P)
+    X, Y, Z = pt
+    z_inv   = pow(Z, -1, P)
+    zz_inv  = z_inv * z_inv % P
+    return (X * zz_inv % P, Y * zz_inv * z_inv % P)
 
+@lru_cache(maxsize=4096)
 def g_mul(k):
     """kG in affine ints.  k==0 -> (0,0) (same convention as the precompile)."""
     k %= R
-    return (0, 0) if k == 0 else to_affine(multiply(G1, k))
+    q = None
+    for row in COMB:
+        b = k & COMB_MASK
+        if b:
+            q = _mixed_add(q, row[b])
+        k >>= COMB_W
+    return to_affine(q)
 
 def mat_vec(mat, scalars, n):
     """(n x n) matrix x (n)-vector over F_r -> list length n."""
-    out = []
-    for i in range(n):
-        acc = 0
-        base = i * n
-        for j in range(n):
-            acc = (acc + mat[base + j] * scalars[j]) % R
-        out.append(acc)
-    return out
+    # one C-level multiply/sum sweep per row, reduced once per output entry;
+    # the unreduced row sum stays below n * (R-1)^2 (~510 bits for n = 6)
+    return [sum(map(mul, mat[i * n:(i + 1) * n], scalars)) % R for i in range(n)]
 
-def pad_points(vec):
-    """Pad list of (x,y) tuples up to MAX_DIM with (0,0)."""
-    return vec + [(0, 0)] * (MAX_DIM - len(vec))
+def build_calldata_s(secrets):
+    """[s_i]G for each secret, written straight into a (0,0)-padded MAX_DIM buffer."""
+    buf = [(0, 0)] * MAX_DIM
+    for i, k in enumerate(secrets):
+        buf[i] = g_mul(k)
+    return buf
 
 def pad_scalars(vec):
     """Pad list of uint256 scalars up to MAX_DIM with 0."""
-    return vec + [0] * (MAX_DIM - len(vec))
+    out = [0] * MAX_DIM
+    out[:len(vec)] = vec
+    return out
 
 def pad_matrix(flat):
     """Pad to MAX_DIM**2 with zeros for the contract's static array."""
-    return flat + [0] * (MAX_DIM * MAX_DIM - len(flat))
+    out = [0] * (MAX_DIM * MAX_DIM)
+    out[:len(flat)] = flat
+    return out
 
 def pad_vector(vec):
     """Pad to MAX_DIM with zeros."""
-    return vec + [0] * (MAX_DIM - len(vec))
+    out = [0] * MAX_DIM
+    out[:len(vec)] = vec
+    return out
 
 # ----------------------------------------------------------------------------
 # Hypothesis composite generator
 # ----------------------------------------------------------------------------
+# Mostly 64-bit scalars (the curve arithmetic doesn't care about magnitude and
+# small draws repeat, so g_mul's cache hits), with full-field draws mixed in.
+scalar = st.one_of(
+    st.integers(min_value=0, max_value=2**64 - 1),
+    st.integers(min_value=0, max_value=R - 1),
+)
+
 @st.composite
 def instance(draw):
     n        = draw(st.integers(min_value=1, max_value=MAX_DIM))
-    scalar   = st.integers(min_value=0, max_value=R - 1)
     matrix   = [draw(scalar) for _ in range(n * n)]
     # the hidden s_i scalars
     secrets  = [draw(scalar) for _ in range(n)]
     return n, matrix, secrets
 
+def with_witness(inst):
+    """Attach the padded [s_i]G calldata and the honest o = M*s to an instance."""
+    n, matrix, secrets = inst
+    calldata_s = build_calldata_s(secrets)
+    o_vec      = mat_vec(matrix, secrets, n)
+    return n, matrix, secrets, calldata_s, o_vec
+
+@st.composite
+def instance_with_witness(draw):
+    return with_witness(draw(instance()))
+
+# Fixed corner cases replayed on every run alongside the random draws
+ZERO_INSTANCE  = with_witness((MAX_DIM, [0] * (MAX_DIM * MAX_DIM), [0] * MAX_DIM))
+ONES_INSTANCE  = with_witness((MAX_DIM, [1] * (MAX_DIM * MAX_DIM), [1] * MAX_DIM))
+FIXED_INSTANCE = with_witness((3,
+                               [R - 1, 2,      3,
+                                2**64, R - 2,  0,
+                                7,     2**200, R // 2],
+                               [R - 1, 2**128 + 1, 12345]))
+
 # ----------------------------------------------------------------------------
 # 1) Deterministic sanity test (n = 2)
 # ----------------------------------------------------------------------------
@@ -84,7 +175,7 @@ def test_manual_example(ec_matmul):
     secrets = [5, 7]
 
     calldata_matrix = pad_matrix(matrix)
-    calldata_s      = pad_points([g_mul(k) for k in secrets])
+    calldata_s      = build_calldata_s(secrets)
     o_vec           = pad_scalars(mat_vec(matrix, secrets, n))
 
     assert ec_matmul.matmul(calldata_matrix, n, calldata_s, o_vec) is True
@@ -92,32 +183,35 @@ def test_manual_example(ec_matmul):
 # ----------------------------------------------------------------------------
 # 2) Hypothesis: valid instances must verify
 # ----------------------------------------------------------------------------
-@given(inst=instance())
-@settings(max_examples=25)
+@given(inst=instance_with_witness())
+@example(inst=ZERO_INSTANCE)
+@example(inst=ONES_INSTANCE)
+@example(inst=FIXED_INSTANCE)
+@settings(max_examples=15)
 def test_matmul_holds(ec_matmul, inst):
-    n, matrix, secrets = inst
+    n, matrix, _, calldata_s, o_vec = inst
 
     calldata_matrix = pad_matrix(matrix)
-    calldata_s      = pad_points([g_mul(k) for k in secrets])
-    o_vec           = pad_scalars(mat_vec(matrix, secrets, n))
+    o_vec_pad       = pad_scalars(o_vec)
 
-    assert ec_matmul.matmul(calldata_matrix, n, calldata_s, o_vec) is True
+    assert ec_matmul.matmul(calldata_matrix, n, calldata_s, o_vec_pad) is True
 
 # ----------------------------------------------------------------------------
 # 3) Hypothesis: flip one o_i -> verification must fail
 # ----------------------------------------------------------------------------
-@given(inst=instance())
-@settings(max_examples=25)
+@given(inst=instance_with_witness())
+@example(inst=ZERO_INSTANCE)
+@example(inst=ONES_INSTANCE)
+@example(inst=FIXED_INSTANCE)
+@settings(max_examples=15)
 def test_matmul_fails_on_wrong_output(ec_matmul, inst):
-    n, matrix, secrets = inst
+    n, matrix, _, calldata_s, o_vec = inst
 
     calldata_matrix = pad_matrix(matrix)
-    calldata_s      = pad_points([g_mul(k) for k in secrets])
-    o_vec           = mat_vec(matrix, secrets, n)
 
-    # Corrupt the first entry
-    o_vec[0] = (o_vec[0] + 1) % R
-    o_vec_pad = pad_scalars(o_vec)
+    # Corrupt the first entry (padding copies, so the shared witness is untouched)
+    o_vec_pad    = pad_scalars(o_vec)
+    o_vec_pad[0] = (o_vec_pad[0] + 1) % R
 
     assert ec_matmul.matmul(calldata_matrix, n, calldata_s, o_vec_pad) is False
 
@@ -1,31 +1,53 @@
-from script.deploy_rational_adder import deploy_rational_adder
+from functools import lru_cache
 import pytest
-from hypothesis import assume, given, strategies as st
+from hypothesis import given, strategies as st
+
+try:
+    # optional: GMP's inverse is ~15x faster than CPython's on 254-bit values
+    from gmpy2 import invert as _gmp_invert
+except ImportError:
+    _gmp_invert = None
 
 # BN-254 scalar-field prime (same constant the Vyper contract uses)
 P = 21888242871839275222246405745257275088548364400416034343698204186575808495617
 
 
-# ---------------------------------------------------------------------------
-# Fixtures
-# ---------------------------------------------------------------------------
-
-@pytest.fixture(scope="module")
-def rational_adder():
-    """
-    Deploy the compiled Vyper contract once for the entire module.
-    """
-    return deploy_rational_adder()
-
-
 # ---------------------------------------------------------------------------
 # Helper functions (pure Python field arithmetic)
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=65536)
 def inv_mod_p(u: int) -> int:
-    """Modular inverse in F_p via Fermat’s little theorem."""
-    # u^(p-2) mod p   (works because p is prime and u ≠ 0)
-    return pow(u, P - 2, P)
+    """Modular inverse in F_p via the extended Euclidean algorithm."""
+    # same result as Fermat's u^(p-2) mod p, but ~10x cheaper than a modexp
+    # (raises for u ≡ 0, which has no inverse anyway)
+    if _gmp_invert is not None:
+        return int(_gmp_invert(u, P))
+    return pow(u, -1, P)
+
+
+def batch_inv(xs: list[int]) -> list[int]:
+    """Invert every element of `xs` in F_p with a single `inv_mod_p` call."""
+    # Montgomery's trick: prefix[i] = x0 * ... * xi, invert only the total,
+    # then peel one factor off per step walking backwards.
+    prefix = []
+    acc = 1
+    for x in xs:
+        acc = (acc * x) % P
+        prefix.append(acc)
+
+    inv = inv_mod_p(acc)
+    out = [0] * len(xs)
+    for i in range(len(xs) - 1, 0, -1):
+        out[i] = (prefix[i - 1] * inv) % P
+        inv = (inv * xs[i]) % P
+    if xs:
+        out[0] = inv
+    return out
+
+
+# inverses of the fixed denominators used by `random_valid_triplet`
+_INV4, _INV7 = inv_mod_p(4), inv_mod_p(7)
 
 
 def random_valid_triplet():
@@ -35,7 +57,7 @@ def random_valid_triplet():
     x1, y1 = 3, 4
     x2, y2 = 5, 7
     den    = 11
-    s  = (x1 * inv_mod_p(y1) + x2 * inv_mod_p(y2)) % P
+    s  = (x1 * _INV4 + x2 * _INV7) % P
     num = (s * den) % P
     return (x1, y1), (x2, y2), num, den
 
@@ -68,7 +90,8 @@ def test_rational_add_holds(rational_adder, x1, y1, x2, y2, den):
     """
     Generates a valid witness and checks the contract returns `True`.
     """
-    s   = (x1 * inv_mod_p(y1) + x2 * inv_mod_p(y2)) % P
+    inv_y1, inv_y2 = batch_inv([y1, y2])
+    s   = (x1 * inv_y1 + x2 * inv_y2) % P
     num = (s * den) % P
 
     assert rational_adder.rationalAdd(
@@ -89,13 +112,14 @@ def test_rational_add_fails_on_wrong_num(rational_adder, x1, y1, x2, y2, den):
     """
     Use a correct witness, then flip `num` by ±1 (mod P); the proof must fail.
     """
-    s   = (x1 * inv_mod_p(y1) + x2 * inv_mod_p(y2)) % P
+    inv_y1, inv_y2 = batch_inv([y1, y2])
+    s   = (x1 * inv_y1 + x2 * inv_y2) % P
     num = (s * den) % P
 
-    # mutate num but keep it in field range
+    # mutate num but keep it in field range; (num + 1) % P can never equal
+    # num because that would need 1 ≡ 0 (mod P), and P > 1
     num_bad = (num + 1) % P
 
-    assume(num_bad != num)           # guard against rare wrap-around
     assert rational_adder.rationalAdd(
         (x1, y1), (x2, y2), num_bad, den
     ) is False